@@ -0,0 +1,159 @@
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import CalendarFeed, new_calendar_feed_nonce
+
+# Calendar feed settings
+CALENDAR_FEED_SALT = 'core.calendar_feed'
+CALENDAR_FEED_MAX_AGE = 60 * 60  # How stale an event edited outside the app may get
+CALENDAR_FEED_PAGE_SIZE = 500
+CALENDAR_FEED_MAX_CACHED_SIZE = 1024 * 1024  # Larger feeds are streamed but never cached
+
+
+# Feed URLs carry a signed per-user nonce, so they do not reveal the user id
+# and can be revoked by resetting the nonce.
+def feed_token(feed):
+    return signing.Signer(salt=CALENDAR_FEED_SALT).sign(feed.nonce)
+
+
+def feed_for_token(token):
+    try:
+        nonce = signing.Signer(salt=CALENDAR_FEED_SALT).unsign(token)
+    except signing.BadSignature:
+        return None
+    return CalendarFeed.objects.filter(nonce=nonce).first()
+
+
+def reset_feed(feed):
+    feed.nonce = new_calendar_feed_nonce()
+    feed.save(update_fields=['nonce'])
+
+
+def bump_feed_version(user):
+    CalendarFeed.objects.filter(user=user).update(version=F('version') + 1)
+
+
+def feed_stamp(feed):
+    # The version changes when the user registers through the app; the time
+    # bucket makes edits made directly in Supabase show up within
+    # CALENDAR_FEED_MAX_AGE. Each feed's bucket is offset so that feeds do not
+    # all expire at the same moment.
+    offset = zlib.crc32(feed.nonce.encode()) % CALENDAR_FEED_MAX_AGE
+    bucket = int((time.time() + offset) // CALENDAR_FEED_MAX_AGE)
+    return f'{feed.version}-{bucket}'
+
+
+def feed_etag(feed, stamp):
+    return f'"{feed.nonce}-{stamp}"'
+
+
+def feed_cache_key(feed, stamp):
+    return f'calendar_feed:{feed.nonce}:{stamp}'
+
+
+def ics_escape(value):
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def ics_line(line):
+    # Fold content lines longer than 75 octets (RFC 5545, section 3.1).
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    # Continuation lines start with a space, leaving room for 74 octets.
+    while len(encoded) > (75 if not parts else 74):
+        cut = 75 if not parts else 74
+        # Never split a multi-byte UTF-8 sequence.
+        while cut > 0 and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def ics_date_lines(value):
+    if not value:
+        return []
+    try:
+        start = datetime.fromisoformat(str(value))
+    except ValueError:
+        return []
+    if len(str(value)) <= 10:
+        start_date = start.date()
+        return [f'DTSTART;VALUE=DATE:{start_date:%Y%m%d}',
+                f'DTEND;VALUE=DATE:{start_date + timedelta(days=1):%Y%m%d}']
+    if start.tzinfo is not None:
+        return [f'DTSTART:{start.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}']
+    return [f'DTSTART:{start:%Y%m%dT%H%M%S}']
+
+
+def ics_event(event, dtstamp, host):
+    date_lines = ics_date_lines(event.get('date'))
+    if not date_lines:
+        # DTSTART is required, and some clients reject the whole calendar
+        # over a single event without one.
+        return ''
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.get("id")}@{host}',
+        f'DTSTAMP:{dtstamp}',
+        *date_lines,
+        f'SUMMARY:{ics_escape(event.get("title") or event.get("name") or "Event")}',
+    ]
+    if event.get('description'):
+        lines.append(f'DESCRIPTION:{ics_escape(event["description"])}')
+    if event.get('location'):
+        lines.append(f'LOCATION:{ics_escape(event["location"])}')
+    lines.append('END:VEVENT')
+    return ''.join(ics_line(line) for line in lines)
+
+
+def fetch_registrations_page(client, user_id, start):
+    return client.table('event_registrations').select('event_id, events(*)').eq(
+        'user_id', user_id).order('event_id').range(start, start + CALENDAR_FEED_PAGE_SIZE - 1).execute().data
+
+
+def generate_feed(client, user_id, host, first_page):
+    yield ics_line('BEGIN:VCALENDAR')
+    yield ics_line('VERSION:2.0')
+    yield ics_line('PRODID:-//GatherEd//Registered Events//EN')
+    yield ics_line('CALSCALE:GREGORIAN')
+    yield ics_line('X-WR-CALNAME:GatherEd Events')
+
+    dtstamp = f'{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}'
+    page, start = first_page, 0
+    while True:
+        # Registrations are fetched a page at a time as the response is streamed.
+        for registration in page:
+            if registration.get('events'):
+                yield ics_event(registration['events'], dtstamp, host)
+        if len(page) < CALENDAR_FEED_PAGE_SIZE:
+            break
+        start += CALENDAR_FEED_PAGE_SIZE
+        page = fetch_registrations_page(client, user_id, start)
+
+    yield ics_line('END:VCALENDAR')
+
+
+def cache_feed(chunks, cache_key):
+    # Keep a copy of the body to cache, unless it grows past
+    # CALENDAR_FEED_MAX_CACHED_SIZE; then only stream it.
+    rendered, size = [], 0
+    for chunk in chunks:
+        if rendered is not None:
+            rendered.append(chunk)
+            size += len(chunk)
+            if size > CALENDAR_FEED_MAX_CACHED_SIZE:
+                rendered = None
+        yield chunk
+    # Only cache a feed that was generated completely.
+    if rendered is not None:
+        cache.set(cache_key, ''.join(rendered), CALENDAR_FEED_MAX_AGE)
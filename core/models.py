@@ -1,6 +1,13 @@
+import secrets
+
 from django.db import models
 from django.contrib.auth.models import User
 
+
+def new_calendar_feed_nonce():
+    return secrets.token_urlsafe(16)
+
+
 # This will store the profile information for a school administrator.
 # It uses a OneToOneField to link directly to the Django User model.
 class AdminProfile(models.Model):
@@ -42,6 +49,17 @@ class EventRegistration(models.Model):
     def __str__(self):
         return f"{self.user.username} registered for {self.event.name}"
 
+# This holds a student's calendar feed URL nonce and the version that is
+# bumped whenever their registrations change. Resetting the nonce revokes
+# the old feed URL.
+class CalendarFeed(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    nonce = models.CharField(max_length=32, unique=True, default=new_calendar_feed_nonce)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Calendar feed for {self.user.username}"
+
 # Announcements are now for the single school.
 class Announcement(models.Model):
     title = models.CharField(max_length=200)
@@ -0,0 +1,157 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase
+from django.urls import reverse
+
+from . import calendar_feed
+from .models import CalendarFeed
+
+
+def registration(event_id, **fields):
+    event = {'id': event_id, 'title': f'Event {event_id}', 'date': '2025-10-01T10:00:00+00:00'}
+    event.update(fields)
+    return {'event_id': event_id, 'events': event}
+
+
+class IcsFormattingTests(SimpleTestCase):
+    def test_escape(self):
+        self.assertEqual(calendar_feed.ics_escape('a\\b; c, d\ne'), 'a\\\\b\\; c\\, d\\ne')
+
+    def test_short_line_is_not_folded(self):
+        self.assertEqual(calendar_feed.ics_line('SUMMARY:Hi'), 'SUMMARY:Hi\r\n')
+
+    def test_long_line_is_folded_at_75_octets(self):
+        folded = calendar_feed.ics_line('DESCRIPTION:' + 'é' * 100)
+        lines = folded[:-2].split('\r\n')
+        self.assertGreater(len(lines), 1)
+        self.assertTrue(all(len(line.encode('utf-8')) <= 75 for line in lines))
+        self.assertTrue(all(line.startswith(' ') for line in lines[1:]))
+        self.assertEqual(''.join(line[1:] if i else line for i, line in enumerate(lines)),
+                         'DESCRIPTION:' + 'é' * 100)
+
+    def test_date_only_event_spans_one_day(self):
+        self.assertEqual(calendar_feed.ics_date_lines('2025-10-01'),
+                         ['DTSTART;VALUE=DATE:20251001', 'DTEND;VALUE=DATE:20251002'])
+
+    def test_event_without_valid_date_is_skipped(self):
+        self.assertEqual(calendar_feed.ics_event({'id': 1, 'date': None}, '20250101T000000Z', 'host'), '')
+        self.assertEqual(calendar_feed.ics_event({'id': 1, 'date': 'soon'}, '20250101T000000Z', 'host'), '')
+
+
+class CalendarFeedTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student@cit.edu', password='password')
+        self.feed = CalendarFeed.objects.create(user=self.user)
+
+    def test_token_round_trip(self):
+        self.assertEqual(calendar_feed.feed_for_token(calendar_feed.feed_token(self.feed)), self.feed)
+
+    def test_token_does_not_contain_user_id(self):
+        self.assertNotIn(str(self.user.pk) + ':', calendar_feed.feed_token(self.feed))
+
+    def test_bad_signature_is_rejected(self):
+        self.assertIsNone(calendar_feed.feed_for_token(self.feed.nonce + ':forged'))
+
+    def test_reset_revokes_old_token(self):
+        old_token = calendar_feed.feed_token(self.feed)
+        calendar_feed.reset_feed(self.feed)
+        self.assertIsNone(calendar_feed.feed_for_token(old_token))
+        self.assertEqual(calendar_feed.feed_for_token(calendar_feed.feed_token(self.feed)), self.feed)
+
+
+class CalendarFeedViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='student@cit.edu', password='password')
+        self.feed = CalendarFeed.objects.create(user=self.user)
+        self.url = reverse('calendar_feed', args=[calendar_feed.feed_token(self.feed)])
+        patcher = mock.patch('core.views.supabase_public')
+        self.supabase = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.execute = (self.supabase.table.return_value.select.return_value.eq.return_value
+                        .order.return_value.range.return_value.execute)
+
+    def set_pages(self, *pages):
+        self.execute.side_effect = [SimpleNamespace(data=page) for page in pages]
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body.decode()
+
+    def test_renders_registered_events(self):
+        self.set_pages([registration(1), registration(2, date=None)])
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertIn('SUMMARY:Event 1\r\n', body)
+        self.assertNotIn('Event 2', body)
+
+    def test_unknown_token_is_404(self):
+        response = self.client.get(reverse('calendar_feed', args=['nonce:forged']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_matching_etag_returns_304(self):
+        self.set_pages([registration(1)])
+        response, _ = self.get()
+        response = self.client.get(self.url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.execute.call_count, 1)
+
+    def test_cache_hit_does_not_call_supabase(self):
+        self.set_pages([registration(1)])
+        _, first_body = self.get()
+        self.supabase.reset_mock()
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, first_body)
+        self.supabase.table.assert_not_called()
+
+    def test_registration_changes_etag(self):
+        self.set_pages([registration(1)], [registration(1), registration(2)])
+        response, _ = self.get()
+        calendar_feed.bump_feed_version(self.user)
+        second, body = self.get(**{'If-None-Match': response['ETag']})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], response['ETag'])
+        self.assertIn('SUMMARY:Event 2\r\n', body)
+
+    @mock.patch.object(calendar_feed, 'CALENDAR_FEED_PAGE_SIZE', 2)
+    def test_pages_through_registrations(self):
+        self.set_pages([registration(1), registration(2)], [registration(3), registration(4)], [registration(5)])
+        _, body = self.get()
+        self.assertEqual(self.execute.call_count, 3)
+        self.assertEqual(body.count('BEGIN:VEVENT'), 5)
+        ranges = [c.args for c in self.supabase.table.return_value.select.return_value.eq.return_value
+                  .order.return_value.range.call_args_list]
+        self.assertEqual(ranges, [(0, 1), (2, 3), (4, 5)])
+
+    @mock.patch.object(calendar_feed, 'CALENDAR_FEED_MAX_CACHED_SIZE', 10)
+    def test_large_feed_is_not_cached(self):
+        self.set_pages([registration(1)], [registration(1)])
+        self.get()
+        self.get()
+        self.assertEqual(self.execute.call_count, 2)
+
+    def test_supabase_outage_returns_503(self):
+        self.execute.side_effect = Exception('connection refused')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_head_is_allowed(self):
+        self.set_pages([registration(1)])
+        response = self.client.head(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_reset_view_revokes_feed_url(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('reset_calendar_feed'))
+        self.assertRedirects(response, reverse('student_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
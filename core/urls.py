@@ -13,4 +13,6 @@ urlpatterns = [
     path('events/create/', views.create_event, name='create_event'),
     path('admin_dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('create_event/', views.create_event, name='create_event'),
+    path('calendar/reset/', views.reset_calendar_feed, name='reset_calendar_feed'),
+    path('calendar/<str:token>.ics', views.calendar_feed, name='calendar_feed'),
 ]
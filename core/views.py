@@ -5,13 +5,21 @@ from django.contrib import messages
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.mail import send_mail
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 import random
 from datetime import datetime, timedelta
 import re
 
+from . import calendar_feed as calendar_feed_helpers
+from .models import CalendarFeed
+
 # Initialize Supabase clients for data storage
 supabase_public: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
@@ -231,10 +239,13 @@ def student_dashboard(request):
         announcements = supabase_public.table('announcements').select('*').execute().data
         registrations = supabase_public.table('event_registrations').select('*, events(*)').eq('user_id',
                                                                                                user_id).execute().data
+        feed, _ = CalendarFeed.objects.get_or_create(user=request.user)
         context = {
             'events': events,
             'announcements': announcements,
             'registered_events': [r.get('events', {}) for r in registrations],
+            'calendar_feed_url': request.build_absolute_uri(
+                reverse('calendar_feed', args=[calendar_feed_helpers.feed_token(feed)])),
         }
         return render(request, 'student_dashboard.html', context)
     except Exception as e:
@@ -278,6 +289,7 @@ def event_register(request, event_id):
                 {'user_id': user_id, 'event_id': event_id}).execute()
             if not insert_result.data:
                 raise Exception(f"Registration insert failed: {getattr(insert_result, 'error', 'Unknown error')}")
+            calendar_feed_helpers.bump_feed_version(request.user)
             messages.success(request, "Registered successfully!")
         return redirect('student_dashboard')
     except Exception as e:
@@ -328,4 +340,49 @@ def create_event(request):
             messages.error(request, f"Failed to create event: {e}")
             return render(request, 'create_event.html')
 
-    return render(request, 'create_event.html')
\ No newline at end of file
+    return render(request, 'create_event.html')
+
+
+@require_safe
+def calendar_feed(request, token):
+    feed = calendar_feed_helpers.feed_for_token(token)
+    if feed is None:
+        raise Http404("Calendar feed not found.")
+
+    stamp = calendar_feed_helpers.feed_stamp(feed)
+    etag = calendar_feed_helpers.feed_etag(feed, stamp)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    content_type = 'text/calendar; charset=utf-8'
+    cache_key = calendar_feed_helpers.feed_cache_key(feed, stamp)
+    body = cache.get(cache_key)
+    if body is not None:
+        response = HttpResponse(body, content_type=content_type)
+    else:
+        user_id = str(feed.user_id)
+        try:
+            # Fetch the first page up front so an outage is reported as an
+            # error instead of a cut-off feed carrying a valid ETag.
+            first_page = calendar_feed_helpers.fetch_registrations_page(supabase_public, user_id, 0)
+        except Exception:
+            response = HttpResponse("Calendar feed is temporarily unavailable.", status=503)
+            response['Retry-After'] = '300'
+            return response
+        chunks = calendar_feed_helpers.generate_feed(supabase_public, user_id, request.get_host(), first_page)
+        response = StreamingHttpResponse(calendar_feed_helpers.cache_feed(chunks, cache_key),
+                                         content_type=content_type)
+    response['ETag'] = etag
+    response['Content-Disposition'] = 'inline; filename="gathered-events.ics"'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@login_required
+def reset_calendar_feed(request):
+    if request.method == 'POST':
+        feed, _ = CalendarFeed.objects.get_or_create(user=request.user)
+        calendar_feed_helpers.reset_feed(feed)
+        messages.success(request, "Your calendar feed URL has been reset. Update it in your calendar app.")
+    return redirect('student_dashboard')